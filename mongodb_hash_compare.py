@@ -10,48 +10,137 @@ Date: 2025-07-24
 """
 
 import pymongo
+import numpy as np
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font
-from openpyxl.utils.dataframe import dataframe_to_rows
+import pyarrow as pa
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
 import argparse
+import asyncio
+import atexit
+import json
 import logging
+import queue
+import shelve
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 import sys
 import os
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
+from urllib.parse import parse_qsl
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:  # Motor is optional and only needed for --async
+    AsyncIOMotorClient = None
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('mongodb_hash_compare.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent dbHash commands across both clusters
+MAX_HASH_WORKERS = 32
+
+# Options shared by every client; the pool is sized for the fan-out. Wire compression
+# shrinks the dbHash responses; PyMongo skips (with a warning) any compressor whose
+# library is not installed and the server negotiates the first match.
+CLIENT_OPTIONS = {
+    'serverSelectionTimeoutMS': 30000,
+    'maxPoolSize': 64,
+    'compressors': 'zstd,snappy,zlib'
+}
+
+# Read preference used when the connection string does not set one, so hashing spreads
+# across replica set members instead of loading the primary
+DEFAULT_READ_PREFERENCE = 'secondaryPreferred'
+
+# Display names of the two clusters in log messages
+CLUSTER_NAMES = {'source': 'source', 'dest': 'destination'}
+
+# Databases excluded from comparison
+SYSTEM_DATABASES = {'admin', 'local', 'config'}
+
+# Arrow-backed string dtype for names, hosts and md5 hex values in the comparison frame
+STRING_DTYPE = pd.StringDtype('pyarrow')
+
+# md5 digests are held as raw 16-byte values and only rendered as hex for the report
+HASH_DTYPE = pd.ArrowDtype(pa.binary(16))
+
+# Column order of the Hash Comparison sheet
+REPORT_COLUMNS = [
+    'Type', 'Database', 'Collection', 'Source_Hash', 'Destination_Hash', 'Match',
+    'Source_Host', 'Dest_Host', 'Source_Time_ms', 'Dest_Time_ms'
+]
+
 class MongoDBHashComparer:
     """Class to handle MongoDB hash comparison between source and destination clusters"""
     
-    def __init__(self, source_uri: str, dest_uri: str):
+    def __init__(self, source_uri: str, dest_uri: str, level: str = 'collection',
+                 cache_file: str = None):
         """
         Initialize the MongoDB hash comparer
         
         Args:
             source_uri: MongoDB connection string for source cluster
             dest_uri: MongoDB connection string for destination cluster
+            level: 'collection' to drill into collection hashes of mismatching
+                databases, or 'db' for a database-level comparison only
+            cache_file: Optional shelve file used to reuse dbHash results between
+                runs for databases with no oplog writes since they were hashed
         """
         self.source_uri = source_uri
         self.dest_uri = dest_uri
+        self.level = level
+        self.cache_file = cache_file
         self.source_client = None
         self.dest_client = None
         
+    def open_client(self, side: str, client_class: Any) -> Any:
+        """
+        Create the client for one cluster and keep it on the comparer
+        
+        Args:
+            side: 'source' or 'dest'
+            client_class: pymongo.MongoClient or AsyncIOMotorClient
+            
+        Returns:
+            The new client; the caller pings it and then calls log_connected
+        """
+        logger.info(f"Connecting to {CLUSTER_NAMES[side]} cluster...")
+        if side == 'source':
+            self.source_client = client_class(self.source_uri, **self.client_options(self.source_uri))
+            return self.source_client
+        self.dest_client = client_class(self.dest_uri, **self.client_options(self.dest_uri))
+        return self.dest_client
+    
+    def client_options(self, uri: str) -> Dict[str, Any]:
+        """
+        Build the client options for a connection string
+        
+        Args:
+            uri: MongoDB connection string
+            
+        Returns:
+            CLIENT_OPTIONS plus DEFAULT_READ_PREFERENCE unless the URI sets readPreference
+        """
+        options = dict(CLIENT_OPTIONS)
+        uri_options = {key.lower() for key, _ in parse_qsl(uri.partition('?')[2], keep_blank_values=True)}
+        if 'readpreference' not in uri_options:
+            options['readPreference'] = DEFAULT_READ_PREFERENCE
+        return options
+    
+    def log_connected(self, side: str):
+        """
+        Log a successful connection check for one cluster
+        
+        Args:
+            side: 'source' or 'dest'
+        """
+        logger.info(f"{CLUSTER_NAMES[side].capitalize()} cluster connection successful")
+    
     def connect_to_clusters(self) -> bool:
         """
         Establish connections to both MongoDB clusters
@@ -60,24 +149,53 @@ class MongoDBHashComparer:
             bool: True if both connections successful, False otherwise
         """
         try:
-            logger.info("Connecting to source cluster...")
-            self.source_client = pymongo.MongoClient(self.source_uri, serverSelectionTimeoutMS=30000)
-            # Test connection
-            self.source_client.admin.command('ping')
-            logger.info("Source cluster connection successful")
-            
-            logger.info("Connecting to destination cluster...")
-            self.dest_client = pymongo.MongoClient(self.dest_uri, serverSelectionTimeoutMS=30000)
-            # Test connection
-            self.dest_client.admin.command('ping')
-            logger.info("Destination cluster connection successful")
+            for side in CLUSTER_NAMES:
+                self.open_client(side, pymongo.MongoClient).admin.command('ping')
+                self.log_connected(side)
+            return True
             
+        except Exception as e:
+            logger.error(f"Failed to connect to clusters: {str(e)}")
+            return False
+    
+    async def connect_to_clusters_async(self) -> bool:
+        """
+        Establish Motor connections to both MongoDB clusters
+        
+        Returns:
+            bool: True if both connections successful, False otherwise
+        """
+        try:
+            for side in CLUSTER_NAMES:
+                await self.open_client(side, AsyncIOMotorClient).admin.command('ping')
+                self.log_connected(side)
             return True
             
         except Exception as e:
             logger.error(f"Failed to connect to clusters: {str(e)}")
             return False
     
+    def close_clients(self):
+        """Close the connections to both clusters"""
+        if self.source_client:
+            self.source_client.close()
+        if self.dest_client:
+            self.dest_client.close()
+    
+    def filter_system_databases(self, all_dbs: List[str]) -> List[str]:
+        """
+        Drop system databases from a database listing and log the result
+        
+        Args:
+            all_dbs: Database names returned by listDatabases
+            
+        Returns:
+            List of database names excluding system databases
+        """
+        non_system_dbs = [db for db in all_dbs if db not in SYSTEM_DATABASES]
+        logger.info(f"Found {len(non_system_dbs)} non-system databases: {non_system_dbs}")
+        return non_system_dbs
+    
     def get_non_system_databases(self, client: pymongo.MongoClient) -> List[str]:
         """
         Get list of non-system databases from MongoDB cluster
@@ -89,17 +207,86 @@ class MongoDBHashComparer:
             List of database names excluding system databases
         """
         try:
-            all_dbs = client.list_database_names()
-            # Exclude system databases
-            system_dbs = {'admin', 'local', 'config'}
-            non_system_dbs = [db for db in all_dbs if db not in system_dbs]
-            logger.info(f"Found {len(non_system_dbs)} non-system databases: {non_system_dbs}")
-            return non_system_dbs
+            return self.filter_system_databases(client.list_database_names())
+            
+        except Exception as e:
+            logger.error(f"Failed to get database list: {str(e)}")
+            return []
+    
+    async def get_non_system_databases_async(self, client: "AsyncIOMotorClient") -> List[str]:
+        """
+        Get list of non-system databases from MongoDB cluster using Motor
+        
+        Args:
+            client: Motor client instance
+            
+        Returns:
+            List of database names excluding system databases
+        """
+        try:
+            return self.filter_system_databases(await client.list_database_names())
             
         except Exception as e:
             logger.error(f"Failed to get database list: {str(e)}")
             return []
     
+    def md5_to_bytes(self, md5_hex: str) -> Optional[bytes]:
+        """
+        Decode an md5 hex digest into its 16 raw bytes
+        
+        Args:
+            md5_hex: 32-character hex digest as returned by dbHash
+            
+        Returns:
+            Raw digest bytes, or None if no digest was returned
+        """
+        return bytes.fromhex(md5_hex) if md5_hex else None
+    
+    def md5_to_hex(self, md5: Optional[bytes]) -> str:
+        """
+        Render a raw md5 digest as hex for the report
+        
+        Args:
+            md5: Raw digest bytes, or None for a database that was not hashed
+            
+        Returns:
+            32-character hex digest or 'NOT HASHED'
+        """
+        return md5.hex() if md5 is not None else 'NOT HASHED'
+    
+    def parse_db_hash_result(self, database: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Extract the relevant fields from a dbHash command response
+        
+        Args:
+            database: Database name
+            result: Raw dbHash command response
+            
+        Returns:
+            Dictionary containing hash results
+        """
+        # Database-level runs never report collection rows, so skip decoding them. The
+        # server hashes and returns every collection either way: dbHash has no option to
+        # skip them, and an empty 'collections' filter means all collections.
+        collections = result.get('collections', {}) if self.level == 'collection' else {}
+        hash_info = {
+            'database': database,
+            'host': result.get('host', 'unknown'),
+            'collections': {
+                coll_name: self.md5_to_bytes(coll_hash)
+                for coll_name, coll_hash in collections.items()
+            },
+            'md5': self.md5_to_bytes(result.get('md5')),
+            'timeMillis': result.get('timeMillis', 0),
+            'level': self.level,
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        logger.debug(f"dbHash completed for {database} in {hash_info['timeMillis']}ms")
+        logger.debug(f"Found {len(hash_info['collections'])} collections in {database}")
+        
+        return hash_info
+    
     def run_db_hash(self, client: pymongo.MongoClient, database: str) -> Dict[str, Any]:
         """
         Run dbHash command on a specific database
@@ -112,29 +299,435 @@ class MongoDBHashComparer:
             Dictionary containing hash results or empty dict on error
         """
         try:
-            logger.info(f"Running dbHash on database: {database}")
+            logger.debug(f"Running dbHash on database: {database}")
             db = client[database]
-            result = db.command("dbHash")
+            # Database.command() ignores the client's read preference, so pass it here
+            result = db.command('dbHash', read_preference=self.hash_read_preference(client))
+            return self.parse_db_hash_result(database, result)
             
-            # Extract relevant information
-            hash_info = {
-                'database': database,
-                'host': result.get('host', 'unknown'),
-                'collections': result.get('collections', {}),
-                'md5': result.get('md5', ''),
-                'timeMillis': result.get('timeMillis', 0),
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            logger.info(f"dbHash completed for {database} in {hash_info['timeMillis']}ms")
-            logger.info(f"Found {len(hash_info['collections'])} collections in {database}")
+        except Exception as e:
+            logger.error(f"Failed to run dbHash on database {database}: {str(e)}")
+            return {}
+    
+    async def run_db_hash_async(self, client: "AsyncIOMotorClient", database: str,
+                                semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """
+        Run dbHash command on a specific database using Motor
+        
+        Args:
+            client: Motor client instance
+            database: Database name
+            semaphore: Bounds the number of dbHash commands in flight
             
-            return hash_info
+        Returns:
+            Dictionary containing hash results or empty dict on error
+        """
+        try:
+            logger.debug(f"Running dbHash on database: {database}")
+            async with semaphore:
+                result = await client[database].command('dbHash', read_preference=self.hash_read_preference(client))
+            return self.parse_db_hash_result(database, result)
             
         except Exception as e:
             logger.error(f"Failed to run dbHash on database {database}: {str(e)}")
             return {}
     
+    def hash_read_preference(self, client: Any) -> Any:
+        """
+        Return the read preference to run dbHash with
+        
+        Cached hashes are validated against the primary's oplog, so with a hash cache
+        dbHash runs on the primary to see every write up to the oplog time read first.
+        
+        Args:
+            client: MongoDB client instance (PyMongo or Motor)
+            
+        Returns:
+            Primary when caching, otherwise the client's read preference
+        """
+        return pymongo.ReadPreference.PRIMARY if self.cache_file else client.read_preference
+    
+    def plan_hash_tasks(self, source_dbs: List[str], dest_dbs: List[str]) -> List[Tuple[str, str]]:
+        """
+        Build the list of (side, database) dbHash tasks for both clusters
+        
+        Only databases present on both clusters are hashed; a database that exists on
+        one side is reported as missing regardless of its hash. Tasks are interleaved
+        per database so source and destination hash the same database side by side.
+        
+        Args:
+            source_dbs: Databases found on the source cluster
+            dest_dbs: Databases found on the destination cluster
+            
+        Returns:
+            List of ('source' | 'dest', database) tuples
+        """
+        tasks = []
+        for db_name in sorted(set(source_dbs) & set(dest_dbs)):
+            tasks.append(('source', db_name))
+            tasks.append(('dest', db_name))
+        return tasks
+    
+    def get_client_host(self, client: Any) -> str:
+        """
+        Return the address of the server a client is connected to
+        
+        Args:
+            client: MongoDB or Motor client instance
+            
+        Returns:
+            'host:port', or 'N/A' if the client has no single address (e.g. several mongos)
+        """
+        try:
+            host, port = client.address
+            return f"{host}:{port}"
+        except Exception:
+            return 'N/A'
+    
+    def record_unhashed_databases(self, source_dbs: List[str], dest_dbs: List[str],
+                                  source_hashes: Dict, dest_hashes: Dict,
+                                  source_host: str, dest_host: str):
+        """
+        Record databases that exist on only one cluster without running dbHash on them
+        
+        Args:
+            source_dbs: Databases found on the source cluster
+            dest_dbs: Databases found on the destination cluster
+            source_hashes: Source hash dictionary to update
+            dest_hashes: Destination hash dictionary to update
+            source_host: Address reported for source-only databases
+            dest_host: Address reported for destination-only databases
+        """
+        source_set, dest_set = set(source_dbs), set(dest_dbs)
+        for db_names, hashes, host in ((source_set - dest_set, source_hashes, source_host),
+                                       (dest_set - source_set, dest_hashes, dest_host)):
+            for db_name in db_names:
+                hashes[db_name] = {
+                    'database': db_name,
+                    'host': host,
+                    'collections': {},
+                    'md5': None,
+                    'timeMillis': 0,
+                    'timestamp': datetime.now().isoformat()
+                }
+        
+        skipped = len(source_set ^ dest_set)
+        if skipped:
+            logger.info(f"Skipping dbHash for {skipped} databases present on only one cluster")
+    
+    def parse_cluster_id(self, hello: Dict[str, Any]) -> Optional[str]:
+        """
+        Identify a replica set from a hello response for use in hash cache keys
+        
+        Args:
+            hello: Response of the hello command
+            
+        Returns:
+            Replica set name and members, or None when the server is not a replica
+            set member (standalone or mongos) and has no oplog to validate against
+        """
+        if not hello.get('setName'):
+            return None
+        return f"{hello['setName']}/{','.join(sorted(hello.get('hosts', [])))}"
+    
+    def build_oplog_change_pipeline(self, since: Any) -> List[Dict[str, Any]]:
+        """
+        Build the aggregation that finds the last write to each database after an oplog time
+        
+        Args:
+            since: Oplog timestamp of the oldest cached hash for the cluster
+            
+        Returns:
+            Pipeline for local.oplog.rs yielding one document per changed database
+        """
+        return [
+            {'$match': {'ts': {'$gt': since}, 'op': {'$ne': 'n'}}},
+            {'$group': {'_id': {'$arrayElemAt': [{'$split': ['$ns', '.']}, 0]}, 'ts': {'$max': '$ts'}}}
+        ]
+    
+    def parse_changed_databases(self, oldest_entry: Optional[Dict[str, Any]], since: Any,
+                                changed: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Interpret the oplog queries used to validate cached hashes
+        
+        Args:
+            oldest_entry: Oldest oplog entry (only 'ts' is used)
+            since: Oplog timestamp the cached hashes were taken at
+            changed: Results of build_oplog_change_pipeline
+            
+        Returns:
+            Last write time per database written to since the given time, or None
+            if the oplog no longer reaches back that far
+        """
+        if oldest_entry is None or oldest_entry['ts'] > since:
+            return None
+        return {doc['_id']: doc['ts'] for doc in changed}
+    
+    def get_oplog(self, client: Any) -> Any:
+        """
+        Return a cluster's oplog collection, read from the primary
+        
+        Args:
+            client: MongoDB client instance (PyMongo or Motor)
+            
+        Returns:
+            local.oplog.rs collection of the client's type
+        """
+        return client.local.get_collection('oplog.rs', read_preference=pymongo.ReadPreference.PRIMARY)
+    
+    def read_hello(self, client: pymongo.MongoClient) -> Dict[str, Any]:
+        """
+        Run the hello command used to identify a cluster in hash cache keys
+        
+        Args:
+            client: MongoDB client instance
+            
+        Returns:
+            Response of the hello command
+        """
+        return client.admin.command('hello')
+    
+    async def read_hello_async(self, client: "AsyncIOMotorClient") -> Dict[str, Any]:
+        """
+        Run the hello command used to identify a cluster in hash cache keys
+        
+        Args:
+            client: Motor client instance
+            
+        Returns:
+            Response of the hello command
+        """
+        return await client.admin.command('hello')
+    
+    def read_oplog(self, client: pymongo.MongoClient, since: Any) -> Dict[str, Any]:
+        """
+        Read the oplog entries needed to validate and store one cluster's cached hashes
+        
+        Args:
+            client: MongoDB client instance
+            since: Oplog timestamp of the oldest cached hash for the cluster, or None
+            
+        Returns:
+            Newest oplog entry under 'newest'; with a since time, also the oldest entry
+            under 'oldest' and build_oplog_change_pipeline results under 'changed'
+        """
+        oplog = self.get_oplog(client)
+        read = {'newest': oplog.find_one({}, {'ts': 1}, sort=[('$natural', -1)])}
+        if since is not None:
+            read['oldest'] = oplog.find_one({}, {'ts': 1}, sort=[('$natural', 1)])
+            read['changed'] = list(oplog.aggregate(self.build_oplog_change_pipeline(since)))
+        return read
+    
+    async def read_oplog_async(self, client: "AsyncIOMotorClient", since: Any) -> Dict[str, Any]:
+        """
+        Read the oplog entries needed to validate and store one cluster's cached hashes
+        
+        Args:
+            client: Motor client instance
+            since: Oplog timestamp of the oldest cached hash for the cluster, or None
+            
+        Returns:
+            Newest oplog entry under 'newest'; with a since time, also the oldest entry
+            under 'oldest' and build_oplog_change_pipeline results under 'changed'
+        """
+        oplog = self.get_oplog(client)
+        read = {'newest': await oplog.find_one({}, {'ts': 1}, sort=[('$natural', -1)])}
+        if since is not None:
+            read['oldest'] = await oplog.find_one({}, {'ts': 1}, sort=[('$natural', 1)])
+            read['changed'] = await oplog.aggregate(self.build_oplog_change_pipeline(since)).to_list(None)
+        return read
+    
+    def call_per_side(self, func: Any, args: Dict[str, Tuple]) -> Dict[str, Any]:
+        """
+        Call a function once per side, returning exceptions instead of raising them
+        
+        Args:
+            func: Function to call
+            args: Positional arguments per side
+            
+        Returns:
+            Result or raised exception per side
+        """
+        results = {}
+        for side, side_args in args.items():
+            try:
+                results[side] = func(*side_args)
+            except Exception as e:
+                results[side] = e
+        return results
+    
+    async def call_per_side_async(self, func: Any, args: Dict[str, Tuple]) -> Dict[str, Any]:
+        """
+        Await a coroutine function once per side concurrently, returning exceptions instead of raising them
+        
+        Args:
+            func: Coroutine function to call
+            args: Positional arguments per side
+            
+        Returns:
+            Result or raised exception per side
+        """
+        results = await asyncio.gather(*(func(*side_args) for side_args in args.values()), return_exceptions=True)
+        return dict(zip(args, results))
+    
+    def load_cached_hashes(self, tasks: List[Tuple[str, str]],
+                           cluster_ids: Dict[str, Optional[str]]) -> Dict[Tuple[str, str], Dict]:
+        """
+        Look up cached dbHash results for the planned tasks
+        
+        The database md5 does not depend on the comparison level, so database-level
+        runs also reuse entries cached by collection-level runs (without their
+        collection hashes); collection-level runs need entries that have them.
+        
+        Args:
+            tasks: Planned (side, database) dbHash tasks
+            cluster_ids: Replica set id per side (None disables caching for that side)
+            
+        Returns:
+            Cached hash info keyed by (side, database)
+        """
+        cached = {}
+        with shelve.open(self.cache_file) as cache:
+            for side, db_name in tasks:
+                if cluster_ids[side]:
+                    entry = cache.get(f"{cluster_ids[side]}|{db_name}")
+                    if entry is None or 'cacheTime' not in entry:
+                        continue
+                    if self.level == 'db':
+                        cached[(side, db_name)] = {**entry, 'collections': {}}
+                    elif entry.get('level') == 'collection':
+                        cached[(side, db_name)] = entry
+        return cached
+    
+    def apply_hash_cache(self, tasks: List[Tuple[str, str]], cached: Dict[Tuple[str, str], Dict],
+                         changed_dbs: Dict[str, Optional[Dict[str, Any]]], results: Dict[str, Dict]) -> List[Tuple[str, str]]:
+        """
+        Fill results from cached hashes of databases with no writes since they were hashed
+        
+        An entry's cacheTime is the primary's newest oplog time read before its dbHash
+        ran, so any write the hash may have missed is logged after it.
+        Writes recorded under admin (transactions are logged as admin.$cmd applyOps
+        entries that may touch any database) invalidate every older cached hash.
+        
+        Args:
+            tasks: Planned (side, database) dbHash tasks
+            cached: Cached hash info keyed by (side, database)
+            changed_dbs: Last write time per changed database for each side (None if unknown)
+            results: Hash dictionaries per side to fill
+            
+        Returns:
+            Tasks that still need dbHash to run
+        """
+        remaining = []
+        for side, db_name in tasks:
+            entry = cached.get((side, db_name))
+            changed = changed_dbs.get(side)
+            if entry is not None and changed is not None:
+                last_writes = [changed[name] for name in (db_name, 'admin') if name in changed]
+                if all(ts <= entry['cacheTime'] for ts in last_writes):
+                    results[side][db_name] = entry
+                    continue
+            remaining.append((side, db_name))
+        
+        if len(remaining) < len(tasks):
+            logger.info(f"Reusing cached hashes for {len(tasks) - len(remaining)} unchanged databases")
+        return remaining
+    
+    def update_hash_cache(self, tasks: List[Tuple[str, str]], cache_state: Dict[str, Any],
+                          results: Dict[str, Dict]):
+        """
+        Store freshly computed dbHash results in the hash cache
+        
+        Results are stored with the oplog watermark read before they were computed;
+        clusters without one (no replica set or unreadable oplog) are not cached.
+        
+        Args:
+            tasks: (side, database) dbHash tasks that were run
+            cache_state: Result of start_hash_cache, updated by resolve_hash_cache
+            results: Hash dictionaries per side
+        """
+        with shelve.open(self.cache_file) as cache:
+            for side, db_name in tasks:
+                hash_info = results[side].get(db_name)
+                watermark = cache_state['watermarks'].get(side)
+                if hash_info and watermark is not None:
+                    cache[f"{cache_state['cluster_ids'][side]}|{db_name}"] = {**hash_info, 'cacheTime': watermark}
+    
+    def oldest_cached_time(self, cached: Dict[Tuple[str, str], Dict], side: str) -> Any:
+        """
+        Return the oldest cacheTime among one cluster's cached hashes
+        
+        Args:
+            cached: Cached hash info keyed by (side, database)
+            side: 'source' or 'dest'
+            
+        Returns:
+            Oldest oplog timestamp, or None if the cluster has no cached hashes
+        """
+        times = [entry['cacheTime'] for (entry_side, _), entry in cached.items() if entry_side == side]
+        return min(times) if times else None
+    
+    def start_hash_cache(self, tasks: List[Tuple[str, str]], hellos: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Identify both clusters and load their cached hashes
+        
+        Args:
+            tasks: Planned (side, database) dbHash tasks
+            hellos: hello response, or the exception raised, per side
+            
+        Returns:
+            Cache state with 'cluster_ids', 'cached', 'since' (per replica set side, the
+            oplog time to read changes from, or None with no cached hashes) and
+            'watermarks' (filled by resolve_hash_cache)
+        """
+        cluster_ids = {}
+        for side, hello in hellos.items():
+            if isinstance(hello, Exception):
+                logger.warning(f"Failed to identify replica set, hash cache disabled for this cluster: {str(hello)}")
+                cluster_ids[side] = None
+            else:
+                cluster_ids[side] = self.parse_cluster_id(hello)
+        
+        cached = self.load_cached_hashes(tasks, cluster_ids)
+        return {
+            'cluster_ids': cluster_ids,
+            'cached': cached,
+            'since': {
+                side: self.oldest_cached_time(cached, side)
+                for side, cluster_id in cluster_ids.items() if cluster_id
+            },
+            'watermarks': {}
+        }
+    
+    def resolve_hash_cache(self, tasks: List[Tuple[str, str]], cache_state: Dict[str, Any],
+                           oplog_reads: Dict[str, Any], results: Dict[str, Dict]) -> List[Tuple[str, str]]:
+        """
+        Validate cached hashes against the oplog and fill results from the unchanged ones
+        
+        Also records each side's newest oplog time in cache_state['watermarks']; the
+        oplog reads must happen before dbHash runs for it to bound the new hashes.
+        
+        Args:
+            tasks: Planned (side, database) dbHash tasks
+            cache_state: Result of start_hash_cache
+            oplog_reads: read_oplog result, or the exception raised, per side in cache_state['since']
+            results: Hash dictionaries per side to fill
+            
+        Returns:
+            Tasks that still need dbHash to run
+        """
+        changed_dbs = {}
+        for side, read in oplog_reads.items():
+            if isinstance(read, Exception):
+                logger.warning(f"Failed to read oplog, hash cache disabled for this cluster: {str(read)}")
+                continue
+            if read['newest'] is not None:
+                cache_state['watermarks'][side] = read['newest']['ts']
+            if 'changed' in read:
+                changed_dbs[side] = self.parse_changed_databases(read['oldest'], cache_state['since'][side],
+                                                                 read['changed'])
+        return self.apply_hash_cache(tasks, cache_state['cached'], changed_dbs, results)
+    
     def collect_all_hashes(self) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
         """
         Collect hash information from both source and destination clusters
@@ -151,26 +744,167 @@ class MongoDBHashComparer:
         # Get databases from destination cluster  
         dest_dbs = self.get_non_system_databases(self.dest_client)
         
-        # Collect hashes from source cluster
-        logger.info("Collecting hashes from source cluster...")
-        for db_name in source_dbs:
-            hash_result = self.run_db_hash(self.source_client, db_name)
-            if hash_result:
-                source_hashes[db_name] = hash_result
+        # Run dbHash for every database on both clusters concurrently; the commands are
+        # network-bound and PyMongo releases the GIL while waiting on the server
+        clients = {'source': self.source_client, 'dest': self.dest_client}
+        results = {'source': source_hashes, 'dest': dest_hashes}
+        tasks = self.plan_hash_tasks(source_dbs, dest_dbs)
+        self.record_unhashed_databases(source_dbs, dest_dbs, source_hashes, dest_hashes,
+                                       self.get_client_host(self.source_client), self.get_client_host(self.dest_client))
+        
+        if self.cache_file:
+            hellos = self.call_per_side(self.read_hello, {side: (client,) for side, client in clients.items()})
+            cache_state = self.start_hash_cache(tasks, hellos)
+            oplog_reads = self.call_per_side(self.read_oplog, {
+                side: (clients[side], since) for side, since in cache_state['since'].items()
+            })
+            tasks = self.resolve_hash_cache(tasks, cache_state, oplog_reads, results)
+        
+        if tasks:
+            logger.info(f"Collecting hashes for {len(tasks)} databases across both clusters...")
+            with ThreadPoolExecutor(max_workers=min(MAX_HASH_WORKERS, len(tasks))) as executor:
+                futures = {
+                    executor.submit(self.run_db_hash, clients[side], db_name): (side, db_name)
+                    for side, db_name in tasks
+                }
+                for future in as_completed(futures):
+                    side, db_name = futures[future]
+                    hash_result = future.result()
+                    if hash_result:
+                        results[side][db_name] = hash_result
+        
+        if self.cache_file:
+            self.update_hash_cache(tasks, cache_state, results)
+        
+        logger.info(f"Collected hashes for {len(source_hashes)} source and {len(dest_hashes)} destination databases")
+        
+        return source_hashes, dest_hashes
+    
+    async def collect_all_hashes_async(self) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """
+        Collect hash information from both clusters with asyncio.gather over Motor clients
+        
+        Returns:
+            Tuple containing (source_hashes, dest_hashes) dictionaries
+        """
+        source_hashes = {}
+        dest_hashes = {}
+        source_client, dest_client = self.source_client, self.dest_client
+        
+        source_dbs, dest_dbs = await asyncio.gather(self.get_non_system_databases_async(source_client),
+                                                    self.get_non_system_databases_async(dest_client))
+        
+        clients = {'source': source_client, 'dest': dest_client}
+        results = {'source': source_hashes, 'dest': dest_hashes}
+        tasks = self.plan_hash_tasks(source_dbs, dest_dbs)
+        self.record_unhashed_databases(source_dbs, dest_dbs, source_hashes, dest_hashes,
+                                       self.get_client_host(self.source_client), self.get_client_host(self.dest_client))
         
-        # Collect hashes from destination cluster
-        logger.info("Collecting hashes from destination cluster...")
-        for db_name in dest_dbs:
-            hash_result = self.run_db_hash(self.dest_client, db_name)
-            if hash_result:
-                dest_hashes[db_name] = hash_result
+        if self.cache_file:
+            hellos = await self.call_per_side_async(self.read_hello_async,
+                                                    {side: (client,) for side, client in clients.items()})
+            cache_state = self.start_hash_cache(tasks, hellos)
+            oplog_reads = await self.call_per_side_async(self.read_oplog_async, {
+                side: (clients[side], since) for side, since in cache_state['since'].items()
+            })
+            tasks = self.resolve_hash_cache(tasks, cache_state, oplog_reads, results)
         
-        logger.info(f"Collected hashes for {len(source_hashes)} source databases")
-        logger.info(f"Collected hashes for {len(dest_hashes)} destination databases")
+        if tasks:
+            logger.info(f"Collecting hashes for {len(tasks)} databases across both clusters...")
+            # Bound the number of in-flight commands the same way the thread pool does
+            semaphore = asyncio.Semaphore(MAX_HASH_WORKERS)
+            hash_results = await asyncio.gather(*(self.run_db_hash_async(clients[side], db_name, semaphore)
+                                                  for side, db_name in tasks))
+            for (side, db_name), hash_result in zip(tasks, hash_results):
+                if hash_result:
+                    results[side][db_name] = hash_result
+        
+        if self.cache_file:
+            self.update_hash_cache(tasks, cache_state, results)
+        
+        logger.info(f"Collected hashes for {len(source_hashes)} source and {len(dest_hashes)} destination databases")
         
         return source_hashes, dest_hashes
     
-    def prepare_comparison_data(self, source_hashes: Dict, dest_hashes: Dict) -> List[Dict]:
+    def md5_words(self, hashes: pd.Series) -> np.ndarray:
+        """
+        View a column of 16-byte md5 digests as an (N, 2) uint64 array
+        
+        Single-chunk columns are viewed without copying; chunked ones are combined first.
+        
+        Args:
+            hashes: Series of HASH_DTYPE values
+            
+        Returns:
+            Array with one row of two 64-bit words per digest; rows for null
+            digests hold unspecified values
+        """
+        arr = pa.array(hashes, type=pa.binary(16))
+        if isinstance(arr, pa.ChunkedArray):
+            arr = arr.combine_chunks()
+        data = arr.buffers()[1]
+        if data is None:
+            return np.zeros((len(arr), 2), dtype='<u8')
+        return np.frombuffer(data, dtype='<u8', count=2 * len(arr), offset=16 * arr.offset).reshape(-1, 2)
+    
+    def classify_hashes(self, present: np.ndarray, source_md5: pd.Series, dest_md5: pd.Series,
+                        missing_label: str) -> np.ndarray:
+        """
+        Classify each row as MATCH, MISMATCH or missing with bulk uint64 comparisons
+        
+        Args:
+            present: Boolean mask of rows that exist on both clusters
+            source_md5: Source digests (HASH_DTYPE)
+            dest_md5: Destination digests (HASH_DTYPE)
+            missing_label: Label for rows missing on either cluster
+            
+        Returns:
+            Array of Match labels
+        """
+        hashed = source_md5.notna().to_numpy() & dest_md5.notna().to_numpy()
+        source_words = self.md5_words(source_md5)
+        dest_words = self.md5_words(dest_md5)
+        
+        differs = (source_words != dest_words).any(axis=1) | ~hashed
+        return np.where(present, np.where(differs, 'MISMATCH', 'MATCH'), missing_label).astype(object)
+    
+    def build_collection_frame(self, hashes: Dict, db_names: List[str], md5_column: str,
+                               hash_column: str) -> pd.DataFrame:
+        """
+        Build one cluster's collection hashes for the given databases as a DataFrame
+        
+        The total row count is known up front, so columns are filled into
+        preallocated lists instead of growing a list of row tuples.
+        
+        Args:
+            hashes: Hash data from one cluster
+            db_names: Databases whose collections are listed
+            md5_column: Name of the raw digest column
+            hash_column: Name of the hex digest column
+            
+        Returns:
+            DataFrame with Database, Collection and both hash columns
+        """
+        collections = [hashes[db_name].get('collections') or {} for db_name in db_names]
+        counts = [len(db_collections) for db_collections in collections]
+        n_rows = sum(counts)
+        
+        coll_names = [None] * n_rows
+        digests = [None] * n_rows
+        start = 0
+        for db_collections, count in zip(collections, counts):
+            coll_names[start:start + count] = db_collections.keys()
+            digests[start:start + count] = db_collections.values()
+            start += count
+        
+        return pd.DataFrame({
+            'Database': np.repeat(np.array(db_names, dtype=object), counts),
+            'Collection': coll_names,
+            md5_column: digests,
+            hash_column: list(map(self.md5_to_hex, digests))
+        }, dtype=object).astype({'Database': STRING_DTYPE, 'Collection': STRING_DTYPE, md5_column: HASH_DTYPE, hash_column: STRING_DTYPE})
+    
+    def prepare_comparison_data(self, source_hashes: Dict, dest_hashes: Dict) -> pd.DataFrame:
         """
         Prepare data for Excel export by comparing source and destination hashes
         
@@ -179,185 +913,250 @@ class MongoDBHashComparer:
             dest_hashes: Hash data from destination cluster
             
         Returns:
-            List of dictionaries containing comparison data
-        """
-        comparison_data = []
-        
-        # Get all unique database names
-        all_databases = set(source_hashes.keys()) | set(dest_hashes.keys())
-        
-        for db_name in sorted(all_databases):
-            source_info = source_hashes.get(db_name, {})
-            dest_info = dest_hashes.get(db_name, {})
-            
-            # Database level comparison
-            db_row = {
-                'Type': 'Database',
-                'Database': db_name,
-                'Collection': '',
-                'Source_Hash': source_info.get('md5', 'MISSING'),
-                'Destination_Hash': dest_info.get('md5', 'MISSING'),
-                'Match': 'MISSING DB' if not source_info or not dest_info else 
-                        ('MATCH' if source_info.get('md5') == dest_info.get('md5') else 'MISMATCH'),
-                'Source_Host': source_info.get('host', 'N/A'),
-                'Dest_Host': dest_info.get('host', 'N/A'),
-                'Source_Time_ms': source_info.get('timeMillis', 0),
-                'Dest_Time_ms': dest_info.get('timeMillis', 0)
-            }
-            comparison_data.append(db_row)
-            
-            # Collection level comparison
-            source_collections = source_info.get('collections', {})
-            dest_collections = dest_info.get('collections', {})
-            all_collections = set(source_collections.keys()) | set(dest_collections.keys())
-            
-            for coll_name in sorted(all_collections):
-                source_hash = source_collections.get(coll_name, 'MISSING')
-                dest_hash = dest_collections.get(coll_name, 'MISSING')
-                
-                coll_row = {
-                    'Type': 'Collection',
-                    'Database': db_name,
-                    'Collection': coll_name,
-                    'Source_Hash': source_hash,
-                    'Destination_Hash': dest_hash,
-                    'Match': 'MISSING COLLECTION' if source_hash == 'MISSING' or dest_hash == 'MISSING' else
-                            ('MATCH' if source_hash == dest_hash else 'MISMATCH'),
-                    'Source_Host': source_info.get('host', 'N/A'),
-                    'Dest_Host': dest_info.get('host', 'N/A'),
-                    'Source_Time_ms': '',
-                    'Dest_Time_ms': ''
-                }
-                comparison_data.append(coll_row)
+            DataFrame containing one row per database plus one row per collection
+            of each mismatching database
+        """
+        # Bound once; called for every database row built below
+        md5_to_hex = self.md5_to_hex
+        
+        # Database level comparison: one long-form frame per cluster, joined on name
+        source_db_df = pd.DataFrame(
+            [(db_name, info.get('md5'), md5_to_hex(info.get('md5')), info.get('host', 'N/A'),
+              info.get('timeMillis', 0))
+             for db_name, info in source_hashes.items()],
+            columns=['Database', 'Source_md5', 'Source_Hash', 'Source_Host', 'Source_Time_ms']
+        ).astype({'Database': STRING_DTYPE, 'Source_md5': HASH_DTYPE, 'Source_Hash': STRING_DTYPE, 'Source_Host': STRING_DTYPE})
+        dest_db_df = pd.DataFrame(
+            [(db_name, info.get('md5'), md5_to_hex(info.get('md5')), info.get('host', 'N/A'),
+              info.get('timeMillis', 0))
+             for db_name, info in dest_hashes.items()],
+            columns=['Database', 'Dest_md5', 'Destination_Hash', 'Dest_Host', 'Dest_Time_ms']
+        ).astype({'Database': STRING_DTYPE, 'Dest_md5': HASH_DTYPE, 'Destination_Hash': STRING_DTYPE, 'Dest_Host': STRING_DTYPE})
+        db_df = source_db_df.merge(dest_db_df, how='outer', on='Database', indicator=True)
+        db_df['Match'] = self.classify_hashes(
+            (db_df['_merge'] == 'both').to_numpy(), db_df['Source_md5'], db_df['Dest_md5'], 'MISSING DB'
+        )
+        db_df['Type'] = 'Database'
+        db_df['Collection'] = ''
+        db_df[['Source_Time_ms', 'Dest_Time_ms']] = db_df[['Source_Time_ms', 'Dest_Time_ms']].fillna(0).astype(int)
+        
+        # The database md5 is derived from its collection hashes, so collection
+        # rows are only needed to pinpoint differences in mismatching databases
+        mismatch_dbs = db_df.loc[db_df['Match'] == 'MISMATCH', 'Database'].tolist()
+        
+        # Collection level comparison
+        source_coll_df = self.build_collection_frame(source_hashes, mismatch_dbs, 'Source_md5', 'Source_Hash')
+        dest_coll_df = self.build_collection_frame(dest_hashes, mismatch_dbs, 'Dest_md5', 'Destination_Hash')
+        coll_df = source_coll_df.merge(dest_coll_df, how='outer', on=['Database', 'Collection'], indicator=True)
+        coll_df['Match'] = self.classify_hashes(
+            (coll_df['_merge'] == 'both').to_numpy(), coll_df['Source_md5'], coll_df['Dest_md5'], 'MISSING COLLECTION'
+        )
+        coll_df['Type'] = 'Collection'
+        db_hosts = db_df.set_index('Database')[['Source_Host', 'Dest_Host']]
+        coll_df['Source_Host'] = coll_df['Database'].map(db_hosts['Source_Host'])
+        coll_df['Dest_Host'] = coll_df['Database'].map(db_hosts['Dest_Host'])
+        coll_df['Source_Time_ms'] = ''
+        coll_df['Dest_Time_ms'] = ''
         
-        return comparison_data
+        # Database rows sort ahead of their collections because their Collection is ''
+        df = pd.concat([db_df, coll_df], ignore_index=True)
+        df = df.sort_values(['Database', 'Collection'], kind='stable', ignore_index=True)
+        df = df.astype({'Type': STRING_DTYPE, 'Collection': STRING_DTYPE, 'Match': STRING_DTYPE})
+        df = df.fillna({
+            'Source_Hash': 'MISSING',
+            'Destination_Hash': 'MISSING',
+            'Source_Host': 'N/A',
+            'Dest_Host': 'N/A'
+        })
+        
+        return df[REPORT_COLUMNS]
+    
+    def compute_column_widths(self, df: pd.DataFrame, include_header: bool = True) -> List[int]:
+        """
+        Compute the length of the longest rendered value in each column
+        
+        Args:
+            df: DataFrame to measure
+            include_header: Whether column names count towards the width
+            
+        Returns:
+            List of character widths, one per column
+        """
+        if len(df):
+            widths = df.astype(str).apply(lambda col: col.str.len().max()).to_numpy()
+        else:
+            widths = np.zeros(len(df.columns), dtype=int)
+        if include_header:
+            widths = np.maximum(widths, df.columns.astype(str).str.len().to_numpy())
+        return [int(width) for width in widths]
     
-    def create_excel_report(self, comparison_data: List[Dict], output_file: str):
+    def create_excel_report(self, df: pd.DataFrame, output_file: str):
         """
         Create Excel report with hash comparison results and highlight mismatches
         
         Args:
-            comparison_data: List of comparison data dictionaries
+            df: Comparison DataFrame from prepare_comparison_data
             output_file: Output Excel file path
         """
         try:
-            # Create DataFrame
-            df = pd.DataFrame(comparison_data)
-            
-            # Create workbook and worksheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Hash Comparison"
+            # Stream the workbook to disk row by row; formats are registered once and
+            # row colors are applied by conditional formatting rules rather than per cell
+            wb = xlsxwriter.Workbook(output_file, {'constant_memory': True})
+            ws = wb.add_worksheet("Hash Comparison")
             
             # Define styles
-            mismatch_fill = PatternFill(start_color='FFE6E6', end_color='FFE6E6', fill_type='solid')  # Light red
-            missing_fill = PatternFill(start_color='FFF0E6', end_color='FFF0E6', fill_type='solid')   # Light orange
-            match_fill = PatternFill(start_color='E6F7E6', end_color='E6F7E6', fill_type='solid')     # Light green
-            header_fill = PatternFill(start_color='D9E1F2', end_color='D9E1F2', fill_type='solid')   # Light blue
-            header_font = Font(bold=True)
-            
-            # Add data to worksheet
-            for r in dataframe_to_rows(df, index=False, header=True):
-                ws.append(r)
-            
-            # Style header row
-            for cell in ws[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-            
-            # Apply conditional formatting
-            for row_idx, row in enumerate(ws.iter_rows(min_row=2, max_row=len(df) + 1), 2):
-                match_status = ws[f'F{row_idx}'].value  # Match column
-                
-                if 'MISMATCH' in str(match_status):
-                    for cell in row:
-                        cell.fill = mismatch_fill
-                elif 'MISSING' in str(match_status):
-                    for cell in row:
-                        cell.fill = missing_fill
-                elif 'MATCH' == str(match_status):
-                    for cell in row:
-                        cell.fill = match_fill
+            mismatch_fmt = wb.add_format({'bg_color': '#FFE6E6'})  # Light red
+            missing_fmt = wb.add_format({'bg_color': '#FFF0E6'})   # Light orange
+            match_fmt = wb.add_format({'bg_color': '#E6F7E6'})     # Light green
+            header_fmt = wb.add_format({'bg_color': '#D9E1F2', 'bold': True})  # Light blue
+            
+            # Add data to worksheet (constant_memory mode requires row order)
+            columns = list(df.columns)
+            ws.write_row(0, 0, columns, header_fmt)
+            for row_idx, row in enumerate(df.itertuples(index=False, name=None), 1):
+                ws.write_row(row_idx, 0, row)
+            
+            # Apply conditional formatting keyed on the Match column
+            if len(df):
+                match_col = xl_col_to_name(columns.index('Match'))
+                last_row, last_col = len(df), len(columns) - 1
+                ws.conditional_format(1, 0, last_row, last_col, {
+                    'type': 'formula', 'criteria': f'=ISNUMBER(SEARCH("MISMATCH",${match_col}2))',
+                    'format': mismatch_fmt, 'stop_if_true': True
+                })
+                ws.conditional_format(1, 0, last_row, last_col, {
+                    'type': 'formula', 'criteria': f'=ISNUMBER(SEARCH("MISSING",${match_col}2))',
+                    'format': missing_fmt, 'stop_if_true': True
+                })
+                ws.conditional_format(1, 0, last_row, last_col, {
+                    'type': 'formula', 'criteria': f'=${match_col}2="MATCH"',
+                    'format': match_fmt
+                })
             
             # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+            for col_idx, width in enumerate(self.compute_column_widths(df)):
+                ws.set_column(col_idx, col_idx, min(width + 2, 50))
             
             # Add summary sheet
-            summary_ws = wb.create_sheet("Summary")
+            summary_ws = wb.add_worksheet("Summary")
             
             # Calculate summary statistics
-            total_databases = len([row for row in comparison_data if row['Type'] == 'Database'])
-            total_collections = len([row for row in comparison_data if row['Type'] == 'Collection'])
-            db_mismatches = len([row for row in comparison_data if row['Type'] == 'Database' and 'MISMATCH' in row['Match']])
-            coll_mismatches = len([row for row in comparison_data if row['Type'] == 'Collection' and 'MISMATCH' in row['Match']])
-            missing_dbs = len([row for row in comparison_data if row['Type'] == 'Database' and 'MISSING' in row['Match']])
-            missing_colls = len([row for row in comparison_data if row['Type'] == 'Collection' and 'MISSING' in row['Match']])
-            
+            summary = self.summarize_comparison(df)
             summary_data = [
                 ['MongoDB Hash Comparison Summary', ''],
-                ['Generated on', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
+                ['Generated on', summary['generated_on']],
                 ['', ''],
-                ['Total Databases Compared', total_databases],
-                ['Database Hash Mismatches', db_mismatches],
-                ['Missing Databases', missing_dbs],
+                ['Total Databases Compared', summary['total_databases']],
+                ['Database Hash Mismatches', summary['database_mismatches']],
+                ['Missing Databases', summary['missing_databases']],
                 ['', ''],
-                ['Total Collections Compared', total_collections],
-                ['Collection Hash Mismatches', coll_mismatches],
-                ['Missing Collections', missing_colls],
+                ['Collections in Mismatching Databases', summary['collections_in_mismatching_databases']],
+                ['Collection Hash Mismatches', summary['collection_mismatches']],
+                ['Missing Collections', summary['missing_collections']],
                 ['', ''],
-                ['Overall Status', 'PASS' if (db_mismatches + coll_mismatches + missing_dbs + missing_colls) == 0 else 'FAIL']
+                ['Overall Status', summary['overall_status']]
             ]
             
-            for row_data in summary_data:
-                summary_ws.append(row_data)
-            
-            # Style summary sheet
-            summary_ws['A1'].font = Font(bold=True, size=14)
-            for row in summary_ws.iter_rows(min_row=1, max_row=len(summary_data)):
-                if row[0].value and ':' not in str(row[0].value) and row[0].value != '':
-                    row[0].font = Font(bold=True)
+            # Style summary sheet: bold title and labels
+            title_fmt = wb.add_format({'bold': True, 'font_size': 14})
+            label_fmt = wb.add_format({'bold': True})
+            for row_idx, (label, value) in enumerate(summary_data):
+                if not label:
+                    continue  # spacer row; leave the cells empty rather than formatted blanks
+                summary_ws.write(row_idx, 0, label, title_fmt if row_idx == 0 else label_fmt)
+                summary_ws.write(row_idx, 1, value)
             
             # Auto-adjust summary column widths
-            for column in summary_ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = max_length + 2
-                summary_ws.column_dimensions[column_letter].width = adjusted_width
+            summary_widths = self.compute_column_widths(pd.DataFrame(summary_data), include_header=False)
+            for col_idx, width in enumerate(summary_widths):
+                summary_ws.set_column(col_idx, col_idx, width + 2)
             
             # Save workbook
-            wb.save(output_file)
+            wb.close()
             logger.info(f"Excel report saved to: {output_file}")
             
-            # Print summary to console
-            logger.info("=== COMPARISON SUMMARY ===")
-            logger.info(f"Total Databases: {total_databases}")
-            logger.info(f"Database Mismatches: {db_mismatches}")
-            logger.info(f"Missing Databases: {missing_dbs}")
-            logger.info(f"Total Collections: {total_collections}")
-            logger.info(f"Collection Mismatches: {coll_mismatches}")
-            logger.info(f"Missing Collections: {missing_colls}")
-            logger.info(f"Overall Status: {'PASS' if (db_mismatches + coll_mismatches + missing_dbs + missing_colls) == 0 else 'FAIL'}")
+            self.log_summary(summary)
             
         except Exception as e:
             logger.error(f"Failed to create Excel report: {str(e)}")
             raise
     
+    def create_tabular_report(self, df: pd.DataFrame, output_file: str):
+        """
+        Write comparison results to a Parquet or CSV file with a JSON summary sidecar
+        
+        Args:
+            df: Comparison DataFrame from prepare_comparison_data
+            output_file: Output file path ending in .parquet or .csv
+        """
+        try:
+            # Collection rows carry no timing; store them as nulls so the columns stay numeric
+            df = df.assign(**{
+                col: pd.to_numeric(df[col], errors='coerce').astype('Int64')
+                for col in ('Source_Time_ms', 'Dest_Time_ms')
+            })
+            
+            if output_file.lower().endswith('.parquet'):
+                df.to_parquet(output_file, engine='pyarrow', compression='zstd', index=False)
+            else:
+                df.to_csv(output_file, index=False)
+            logger.info(f"Report saved to: {output_file}")
+            
+            summary = self.summarize_comparison(df)
+            summary_file = f"{os.path.splitext(output_file)[0]}.summary.json"
+            with open(summary_file, 'w') as f:
+                json.dump(summary, f, indent=2)
+            logger.info(f"Summary saved to: {summary_file}")
+            
+            self.log_summary(summary)
+            
+        except Exception as e:
+            logger.error(f"Failed to create report: {str(e)}")
+            raise
+    
+    def summarize_comparison(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Calculate summary statistics for the comparison results
+        
+        Args:
+            df: Comparison DataFrame from prepare_comparison_data
+            
+        Returns:
+            Dictionary of summary counts and overall PASS/FAIL status
+        """
+        # One grouping pass over the comparison rows yields every count
+        counts = df.groupby(['Type', 'Match']).size()
+        type_totals = counts.groupby(level='Type').sum()
+        summary = {
+            'generated_on': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'total_databases': int(type_totals.get('Database', 0)),
+            'database_mismatches': int(counts.get(('Database', 'MISMATCH'), 0)),
+            'missing_databases': int(counts.get(('Database', 'MISSING DB'), 0)),
+            'collections_in_mismatching_databases': int(type_totals.get('Collection', 0)),
+            'collection_mismatches': int(counts.get(('Collection', 'MISMATCH'), 0)),
+            'missing_collections': int(counts.get(('Collection', 'MISSING COLLECTION'), 0))
+        }
+        failures = (summary['database_mismatches'] + summary['missing_databases'] +
+                    summary['collection_mismatches'] + summary['missing_collections'])
+        summary['overall_status'] = 'PASS' if failures == 0 else 'FAIL'
+        return summary
+    
+    def log_summary(self, summary: Dict[str, Any]):
+        """
+        Print comparison summary to console
+        
+        Args:
+            summary: Summary dictionary from summarize_comparison
+        """
+        logger.info("=== COMPARISON SUMMARY ===")
+        logger.info(f"Total Databases: {summary['total_databases']}")
+        logger.info(f"Database Mismatches: {summary['database_mismatches']}")
+        logger.info(f"Missing Databases: {summary['missing_databases']}")
+        logger.info(f"Collections in Mismatching Databases: {summary['collections_in_mismatching_databases']}")
+        logger.info(f"Collection Mismatches: {summary['collection_mismatches']}")
+        logger.info(f"Missing Collections: {summary['missing_collections']}")
+        logger.info(f"Overall Status: {summary['overall_status']}")
+    
     def run_comparison(self, output_file: str = None) -> bool:
         """
         Run the complete hash comparison process
@@ -379,36 +1178,106 @@ class MongoDBHashComparer:
             # Collect hashes from both clusters
             source_hashes, dest_hashes = self.collect_all_hashes()
             
-            if not source_hashes and not dest_hashes:
-                logger.error("No hash data collected from either cluster")
-                return False
+            return self.report_results(source_hashes, dest_hashes, output_file)
+            
+        except Exception as e:
+            logger.error(f"Hash comparison failed: {str(e)}")
+            return False
+        
+        finally:
+            self.close_clients()
+    
+    async def run_comparison_async(self, output_file: str = None) -> bool:
+        """
+        Run the complete hash comparison process using Motor and asyncio
+        
+        Args:
+            output_file: Optional output Excel file path
+            
+        Returns:
+            bool: True if comparison completed successfully
+        """
+        try:
+            if not output_file:
+                output_file = f"mongodb_hash_comparison_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             
-            # Prepare comparison data
-            comparison_data = self.prepare_comparison_data(source_hashes, dest_hashes)
+            # Connect to clusters
+            if not await self.connect_to_clusters_async():
+                return False
             
-            # Create Excel report
-            self.create_excel_report(comparison_data, output_file)
+            # Collect hashes from both clusters
+            source_hashes, dest_hashes = await self.collect_all_hashes_async()
             
-            return True
+            return self.report_results(source_hashes, dest_hashes, output_file)
             
         except Exception as e:
             logger.error(f"Hash comparison failed: {str(e)}")
             return False
         
         finally:
-            # Close connections
-            if self.source_client:
-                self.source_client.close()
-            if self.dest_client:
-                self.dest_client.close()
+            self.close_clients()
+    
+    def report_results(self, source_hashes: Dict, dest_hashes: Dict, output_file: str) -> bool:
+        """
+        Compare collected hashes and write the report
+        
+        Args:
+            source_hashes: Hash data from source cluster
+            dest_hashes: Hash data from destination cluster
+            output_file: Output file path; .parquet and .csv select those formats,
+                anything else produces an Excel report
+            
+        Returns:
+            bool: True if the report was written
+        """
+        if not source_hashes and not dest_hashes:
+            logger.error("No hash data collected from either cluster")
+            return False
+        
+        # Prepare comparison data
+        comparison_df = self.prepare_comparison_data(source_hashes, dest_hashes)
+        
+        # Create report in the format selected by the output file extension
+        if output_file.lower().endswith(('.parquet', '.csv')):
+            self.create_tabular_report(comparison_df, output_file)
+        else:
+            self.create_excel_report(comparison_df, output_file)
+        
+        return True
+
+def configure_logging():
+    """
+    Send log records to the log file and console through a queue
+    
+    Hashing workers only take the QueueHandler's lock for an in-memory put; the
+    file and console writes happen on a single listener thread. Called from
+    main() so importing the module starts no threads.
+    """
+    log_queue = queue.Queue(-1)
+    log_listener = QueueListener(
+        log_queue,
+        logging.FileHandler('mongodb_hash_compare.log'),
+        logging.StreamHandler(sys.stdout)
+    )
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[QueueHandler(log_queue)]
+    )
+    log_listener.start()
+    atexit.register(log_listener.stop)
 
 def main():
     """Main function to handle environment variables and run the comparison"""
+    configure_logging()
+    
     # Get configuration from environment variables
     source_uri = os.getenv('SOURCE_MONGODB_URI')
     dest_uri = os.getenv('DEST_MONGODB_URI')
     output_file = os.getenv('OUTPUT_FILE')
     verbose = os.getenv('VERBOSE', 'false').lower() == 'true'
+    level = os.getenv('COMPARISON_LEVEL') or 'collection'
+    cache_file = os.getenv('HASH_CACHE_FILE') or None
     
     # Validate required environment variables
     if not source_uri:
@@ -425,8 +1294,15 @@ def main():
     parser = argparse.ArgumentParser(description='Compare MongoDB cluster hashes using dbHash command')
     parser.add_argument('--source', help='Source MongoDB connection string (overrides env var)')
     parser.add_argument('--destination', help='Destination MongoDB connection string (overrides env var)')
-    parser.add_argument('--output', help='Output Excel file path (overrides env var)')
+    parser.add_argument('--output', help='Output file path; .xlsx, .parquet or .csv (overrides env var)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--level', choices=['db', 'collection'],
+                        help='Compare database hashes only, or also collection hashes of mismatching databases; '
+                             'db only shortens the report, the server still hashes every collection (overrides env var)')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Collect hashes with Motor/asyncio instead of the thread pool (requires motor)')
+    parser.add_argument('--cache-file',
+                        help='Reuse hashes of databases unchanged since the previous run, stored in this file; hashes on the primary (overrides env var)')
     
     args = parser.parse_args()
     
@@ -439,6 +1315,18 @@ def main():
         output_file = args.output
     if args.verbose:
         verbose = True
+    if args.level:
+        level = args.level
+    if args.cache_file:
+        cache_file = args.cache_file
+    
+    if level not in ('db', 'collection'):
+        logger.error(f"Invalid COMPARISON_LEVEL '{level}'; expected 'db' or 'collection'")
+        sys.exit(1)
+    
+    if args.use_async and AsyncIOMotorClient is None:
+        logger.error("--async requires the motor package (pip install motor)")
+        sys.exit(1)
     
     if verbose:
         logging.getLogger().setLevel(logging.DEBUG)
@@ -448,10 +1336,13 @@ def main():
     logger.info(f"Destination cluster: {dest_uri.split('@')[-1] if '@' in dest_uri else dest_uri}")
     
     # Create comparer instance
-    comparer = MongoDBHashComparer(source_uri, dest_uri)
+    comparer = MongoDBHashComparer(source_uri, dest_uri, level, cache_file)
     
-    # Run comparison
-    success = comparer.run_comparison(output_file)
+    # Run comparison (thread pool by default, Motor/asyncio with --async)
+    if args.use_async:
+        success = asyncio.run(comparer.run_comparison_async(output_file))
+    else:
+        success = comparer.run_comparison(output_file)
     
     if success:
         logger.info("Hash comparison completed successfully!")
@@ -0,0 +1,130 @@
+import unittest
+
+from bson.timestamp import Timestamp
+
+from mongodb_hash_compare import MongoDBHashComparer
+
+
+def make_comparer() -> MongoDBHashComparer:
+    return MongoDBHashComparer('mongodb://source', 'mongodb://dest', cache_file='unused')
+
+
+def cache_entry(database: str, time: int) -> dict:
+    return {'database': database, 'md5': b'\x00' * 16, 'collections': {}, 'cacheTime': Timestamp(time, 1)}
+
+
+class ParseChangedDatabasesTest(unittest.TestCase):
+    def setUp(self):
+        self.comparer = make_comparer()
+
+    def test_returns_last_write_per_database(self):
+        changed = [{'_id': 'db1', 'ts': Timestamp(120, 1)}, {'_id': 'admin', 'ts': Timestamp(130, 1)}]
+        result = self.comparer.parse_changed_databases({'ts': Timestamp(50, 1)}, Timestamp(100, 1), changed)
+        self.assertEqual(result, {'db1': Timestamp(120, 1), 'admin': Timestamp(130, 1)})
+
+    def test_no_writes_returns_empty_mapping(self):
+        result = self.comparer.parse_changed_databases({'ts': Timestamp(50, 1)}, Timestamp(100, 1), [])
+        self.assertEqual(result, {})
+
+    def test_oplog_rolled_past_cached_time(self):
+        result = self.comparer.parse_changed_databases({'ts': Timestamp(150, 1)}, Timestamp(100, 1), [])
+        self.assertIsNone(result)
+
+    def test_empty_oplog(self):
+        self.assertIsNone(self.comparer.parse_changed_databases(None, Timestamp(100, 1), []))
+
+
+class OldestCachedTimeTest(unittest.TestCase):
+    def setUp(self):
+        self.comparer = make_comparer()
+
+    def test_oldest_time_per_side(self):
+        cached = {
+            ('source', 'db1'): cache_entry('db1', 200),
+            ('source', 'db2'): cache_entry('db2', 100),
+            ('dest', 'db1'): cache_entry('db1', 50)
+        }
+        self.assertEqual(self.comparer.oldest_cached_time(cached, 'source'), Timestamp(100, 1))
+        self.assertEqual(self.comparer.oldest_cached_time(cached, 'dest'), Timestamp(50, 1))
+
+    def test_side_without_cached_hashes(self):
+        cached = {('source', 'db1'): cache_entry('db1', 100)}
+        self.assertIsNone(self.comparer.oldest_cached_time(cached, 'dest'))
+
+
+class ApplyHashCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.comparer = make_comparer()
+        self.tasks = [('source', 'db1'), ('dest', 'db1'), ('source', 'db2'), ('dest', 'db2')]
+        self.cached = {task: cache_entry(task[1], 100) for task in self.tasks}
+        self.results = {'source': {}, 'dest': {}}
+
+    def apply(self, changed_dbs: dict) -> list:
+        return self.comparer.apply_hash_cache(self.tasks, self.cached, changed_dbs, self.results)
+
+    def test_reuses_unchanged_databases(self):
+        remaining = self.apply({'source': {}, 'dest': {}})
+        self.assertEqual(remaining, [])
+        self.assertIs(self.results['source']['db1'], self.cached[('source', 'db1')])
+        self.assertEqual(set(self.results['dest']), {'db1', 'db2'})
+
+    def test_rehashes_database_written_after_cached_time(self):
+        remaining = self.apply({'source': {'db1': Timestamp(150, 1)}, 'dest': {}})
+        self.assertEqual(remaining, [('source', 'db1')])
+        self.assertNotIn('db1', self.results['source'])
+        self.assertIn('db2', self.results['source'])
+
+    def test_reuses_database_written_before_cached_time(self):
+        remaining = self.apply({'source': {'db1': Timestamp(100, 1)}, 'dest': {'db2': Timestamp(90, 1)}})
+        self.assertEqual(remaining, [])
+
+    def test_admin_write_invalidates_older_entries(self):
+        remaining = self.apply({'source': {'admin': Timestamp(150, 1)}, 'dest': {}})
+        self.assertEqual(remaining, [('source', 'db1'), ('source', 'db2')])
+
+    def test_unknown_changes_rehash_side(self):
+        remaining = self.apply({'source': {}, 'dest': None})
+        self.assertEqual(remaining, [('dest', 'db1'), ('dest', 'db2')])
+
+    def test_side_without_oplog_read_rehashes(self):
+        remaining = self.apply({'source': {}})
+        self.assertEqual(remaining, [('dest', 'db1'), ('dest', 'db2')])
+
+    def test_uncached_database_is_hashed(self):
+        del self.cached[('dest', 'db2')]
+        remaining = self.apply({'source': {}, 'dest': {}})
+        self.assertEqual(remaining, [('dest', 'db2')])
+        self.assertNotIn('db2', self.results['dest'])
+
+
+class ResolveHashCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.comparer = make_comparer()
+        self.tasks = [('source', 'db1'), ('dest', 'db1')]
+        self.cache_state = {
+            'cluster_ids': {'source': 'rs0/a:27017', 'dest': 'rs1/b:27017'},
+            'cached': {('source', 'db1'): cache_entry('db1', 100)},
+            'since': {'source': Timestamp(100, 1), 'dest': None},
+            'watermarks': {}
+        }
+        self.results = {'source': {}, 'dest': {}}
+
+    def test_records_watermarks_and_reuses_unchanged(self):
+        oplog_reads = {
+            'source': {'newest': {'ts': Timestamp(300, 1)}, 'oldest': {'ts': Timestamp(1, 1)}, 'changed': []},
+            'dest': {'newest': {'ts': Timestamp(200, 1)}}
+        }
+        remaining = self.comparer.resolve_hash_cache(self.tasks, self.cache_state, oplog_reads, self.results)
+        self.assertEqual(remaining, [('dest', 'db1')])
+        self.assertEqual(self.cache_state['watermarks'], {'source': Timestamp(300, 1), 'dest': Timestamp(200, 1)})
+
+    def test_oplog_read_failure_disables_cache_for_side(self):
+        oplog_reads = {'source': RuntimeError('not authorized'), 'dest': {'newest': None}}
+        with self.assertLogs(level='WARNING'):
+            remaining = self.comparer.resolve_hash_cache(self.tasks, self.cache_state, oplog_reads, self.results)
+        self.assertEqual(remaining, self.tasks)
+        self.assertEqual(self.cache_state['watermarks'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()